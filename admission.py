@@ -0,0 +1,220 @@
+# This file limits how many expensive commands each user and guild can run at once
+
+import time
+import asyncio
+import logging
+import functools
+import discord
+from collections import Counter, OrderedDict, deque
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed instead of queued"""
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"Request rejected ({reason}), retry after {retry_after:.1f}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController():
+    """
+    Admission control for expensive commands.
+
+    - Each user may have at most max_per_user requests running or queued, extra requests are rejected.
+    - Each guild may have at most max_per_guild requests running, extra requests wait in that guild's queue.
+    - At most max_concurrent requests run in total, free slots are handed to the guild queues round-robin
+      so one busy guild cannot starve the others.
+    - A request is shed early when its estimated wait is over latency_budget seconds, and a queued
+      request that has not started within latency_budget is dropped.
+    - Callers pass on_queued to acknowledge the interaction before a request starts waiting,
+      so time spent in the queue does not count against Discord's 3 second window.
+    """
+    def __init__(self, max_per_user: int = 2, max_per_guild: int = 4, max_concurrent: int = 8, latency_budget: float = 2.5):
+        self.max_per_user = max_per_user
+        self.max_per_guild = max_per_guild
+        self.max_concurrent = max_concurrent
+        self.latency_budget = latency_budget
+
+        self._running = 0
+        self._guild_running = Counter()
+        self._user_active = Counter()  # Running or queued
+        self._queues = OrderedDict()   # guild id -> deque of futures, in round-robin order
+        self._service_time = 1.0       # Moving average of how long a request runs, in seconds
+
+        # Counters
+        self.admitted = 0
+        self.rejections = Counter()    # reason -> count
+
+    def queued(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def stats(self) -> dict:
+        return {
+            "running": self._running,
+            "queued": self.queued(),
+            "admitted": self.admitted,
+            "rejected": dict(self.rejections),
+            "service_time": self._service_time,
+        }
+
+    def estimated_wait(self, guild_id: int) -> float:
+        """Estimates how long a new request from the guild would wait for a slot"""
+        if self._running < self.max_concurrent and self._guild_running[guild_id] < self.max_per_guild and guild_id not in self._queues:
+            return 0.0
+        guild_queued = len(self._queues.get(guild_id, ()))
+        guild_wait = (guild_queued + 1) / self.max_per_guild * self._service_time
+        total_wait = (self.queued() + 1) / self.max_concurrent * self._service_time
+        return max(guild_wait, total_wait)
+
+    def _reject(self, reason: str, retry_after: float, user_id: int, guild_id: int) -> AdmissionRejected:
+        self.rejections[reason] += 1
+        logging.warning(f"Admission rejected user {user_id} in guild {guild_id} ({reason}), "
+                        f"retry after {retry_after:.1f}s, rejections so far: {dict(self.rejections)}")
+        return AdmissionRejected(reason, retry_after)
+
+    def _start(self, guild_id: int) -> None:
+        self._running += 1
+        self._guild_running[guild_id] += 1
+
+    def _dispatch(self) -> None:
+        """Hands free slots to queued requests, one guild at a time in round-robin order"""
+        progressed = True
+        while progressed and self._running < self.max_concurrent:
+            progressed = False
+            for guild_id in list(self._queues):
+                if self._guild_running[guild_id] >= self.max_per_guild:
+                    continue
+
+                queue = self._queues.pop(guild_id)
+                waiter = queue.popleft()
+                if queue:
+                    self._queues[guild_id] = queue  # Back of the round-robin order
+                progressed = True
+                if waiter.done():
+                    continue  # Cancelled while queued
+
+                self._start(guild_id)
+                waiter.set_result(None)
+                break
+
+    def _release(self, user_id: int, guild_id: int, started_at: float) -> None:
+        self._running -= 1
+        self._guild_running[guild_id] -= 1
+        if self._guild_running[guild_id] <= 0:
+            del self._guild_running[guild_id]
+        self._service_time = 0.8 * self._service_time + 0.2 * (time.monotonic() - started_at)
+        self._dispatch()
+
+    def _leave(self, user_id: int) -> None:
+        self._user_active[user_id] -= 1
+        if self._user_active[user_id] <= 0:
+            del self._user_active[user_id]
+
+    async def _acquire(self, user_id: int, guild_id: int, on_queued=None) -> None:
+        if self._user_active[user_id] >= self.max_per_user:
+            raise self._reject("user", self._service_time, user_id, guild_id)
+
+        wait = self.estimated_wait(guild_id)
+        if wait > self.latency_budget:
+            raise self._reject("latency", wait, user_id, guild_id)
+
+        # Join the guild's queue and take a slot right away if one is free
+        self._user_active[user_id] += 1
+        waiter = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(guild_id, deque()).append(waiter)
+        self._dispatch()
+        if waiter.done():
+            return
+
+        try:
+            if on_queued:
+                await on_queued()
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=self.latency_budget)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                return  # Granted just as the timeout fired
+            self._discard(guild_id, waiter)
+            self._leave(user_id)
+            raise self._reject("timeout", self.estimated_wait(guild_id), user_id, guild_id)
+        except BaseException:
+            # Cancelled, or on_queued failed
+            if waiter.done() and not waiter.cancelled():
+                self._leave(user_id)
+                self._release(user_id, guild_id, time.monotonic())
+            else:
+                self._discard(guild_id, waiter)
+                self._leave(user_id)
+            raise
+
+    def _discard(self, guild_id: int, waiter: asyncio.Future) -> None:
+        """Removes a request that gave up waiting from its guild's queue"""
+        waiter.cancel()
+        queue = self._queues.get(guild_id)
+        if queue and waiter in queue:
+            queue.remove(waiter)
+            if not queue:
+                del self._queues[guild_id]
+
+    class _Admission():
+        def __init__(self, controller, user_id: int, guild_id: int, on_queued=None):
+            self.controller = controller
+            self.user_id = user_id
+            self.guild_id = guild_id
+            self.on_queued = on_queued
+            self.started_at = None
+
+        async def __aenter__(self):
+            await self.controller._acquire(self.user_id, self.guild_id, self.on_queued)
+            self.controller.admitted += 1
+            self.started_at = time.monotonic()
+            return self
+
+        async def __aexit__(self, exc_type, exc, tb):
+            self.controller._leave(self.user_id)
+            self.controller._release(self.user_id, self.guild_id, self.started_at)
+            return False
+
+    def admit(self, user_id: int, guild_id: int, on_queued=None):
+        """
+        Async context manager holding a slot for the request, raises AdmissionRejected if shed.
+        on_queued is awaited once if the request has to wait for a slot.
+        """
+        return self._Admission(self, user_id, guild_id, on_queued)
+
+
+def admission_controlled(func):
+    """
+    Decorator for cog app command callbacks that runs the command under the bot's
+    AdmissionController and answers with a retry-after message when it is shed.
+
+    If the command has to queue, the interaction is deferred first. Commands should
+    answer through response_pipeline (ProgressiveResponse or reply), which handle an
+    interaction that is already acknowledged.
+    """
+    @functools.wraps(func)
+    async def wrapper(self, interaction: discord.Interaction, *args, **kwargs):
+        controller = getattr(self.bot, "admission", None)
+        if controller is None:
+            return await func(self, interaction, *args, **kwargs)
+
+        async def defer():
+            if not interaction.response.is_done():
+                await interaction.response.defer(thinking=True)
+
+        # Direct messages share one pseudo guild
+        guild_id = interaction.guild_id or 0
+        try:
+            async with controller.admit(interaction.user.id, guild_id, on_queued=defer):
+                return await func(self, interaction, *args, **kwargs)
+        except AdmissionRejected as e:
+            message = f"StockBot is busy right now. Please try again in {max(1, round(e.retry_after))} second(s)."
+            try:
+                if interaction.response.is_done():
+                    # Replaces the 'thinking' placeholder left by the deferral
+                    await interaction.edit_original_response(content=message)
+                else:
+                    await interaction.response.send_message(message, ephemeral=True)
+            except discord.HTTPException as http_error:
+                logging.warning(f"Could not send the admission rejection: {http_error}")
+
+    return wrapper
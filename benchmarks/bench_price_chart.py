@@ -0,0 +1,65 @@
+# Benchmarks plot_util.gen_price_chart to show render time stays flat as the requested range grows.
+# Run from the repository root: python benchmarks/bench_price_chart.py
+
+import os
+import sys
+import time
+import matplotlib
+matplotlib.use("Agg")  # Render without a display
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import plot_util
+
+# Number of one minute candles in each range (about 390 trading minutes per day)
+RANGES = {
+    "1D": 390,
+    "5D": 390 * 5,
+    "1M": 390 * 21,
+    "6M": 390 * 126,
+    "1Y": 390 * 252,
+    "5Y": 390 * 252 * 5,
+}
+REPEATS = 3
+
+
+def synthetic_candles(points: int) -> tuple:
+    """Random walk closing prices and volumes, one point per minute"""
+    rng = np.random.default_rng(0)
+    timestamps = 1_600_000_000 + np.arange(points, dtype=np.int64) * 60
+    closes = 100 + np.cumsum(rng.normal(0, 0.1, points))
+    volumes = rng.integers(1_000, 100_000, points)
+    return timestamps, closes, volumes
+
+
+def time_render(timestamps, closes, volumes, max_points) -> float:
+    """Returns the best wall time of REPEATS renders in seconds"""
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        plot_util.gen_price_chart("BENCH", timestamps, closes, volumes, max_points=max_points)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    print(f"{'range':>6} {'points':>10} {'lttb (ms)':>10} {'render (ms)':>12} {'no downsampling (ms)':>21}")
+    for label, points in RANGES.items():
+        timestamps, closes, volumes = synthetic_candles(points)
+
+        start = time.perf_counter()
+        plot_util.lttb_indices(timestamps, closes, 1000)
+        lttb_ms = (time.perf_counter() - start) * 1000
+
+        render_ms = time_render(timestamps, closes, volumes, max_points=None) * 1000
+
+        # Rendering every point is only measured for the shorter ranges, it gets very slow
+        if points <= 390 * 126:
+            full_ms = f"{time_render(timestamps, closes, volumes, max_points=points) * 1000:21.0f}"
+        else:
+            full_ms = f"{'skipped':>21}"
+        print(f"{label:>6} {points:>10} {lttb_ms:>10.1f} {render_ms:>12.0f} {full_ms}")
+
+
+if __name__ == "__main__":
+    main()
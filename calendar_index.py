@@ -0,0 +1,93 @@
+# This file stores bulk downloaded earnings and IPO calendars for fast date-range and per-symbol queries
+
+import bisect
+import logging
+from datetime import date, datetime
+
+
+class CalendarEvent():
+    """A single calendar entry spanning from start to end (inclusive)"""
+    __slots__ = ("kind", "symbol", "start", "end", "data")
+
+    def __init__(self, kind: str, symbol: str, start: date, end: date, data: dict):
+        self.kind = kind      # "earnings" or "ipo"
+        self.symbol = symbol
+        self.start = start
+        self.end = end
+        self.data = data      # Raw Finnhub entry
+
+    def __repr__(self):
+        return f"CalendarEvent({self.kind}, {self.symbol}, {self.start}, {self.end})"
+
+
+class IntervalIndex():
+    """
+    Immutable interval index over calendar events.
+
+    Events are sorted by start day. Since no event spans more than the longest
+    interval seen, a range query only has to bisect the starts between
+    (range start - longest span) and range end and then check the end day.
+    A per-symbol index keeps the positions of each symbol's events in start order.
+    """
+    def __init__(self, events: list):
+        self.events = sorted(events, key=lambda event: (event.start, event.symbol))
+        self._starts = [event.start.toordinal() for event in self.events]
+        self._max_span = max((event.end.toordinal() - event.start.toordinal() for event in self.events), default=0)
+
+        self._by_symbol = {}
+        for position, event in enumerate(self.events):
+            self._by_symbol.setdefault(event.symbol, []).append(position)
+
+    def __len__(self):
+        return len(self.events)
+
+    def overlapping(self, start: date, end: date, kind: str = None) -> list:
+        """Returns the events that overlap the inclusive range [start, end]"""
+        first = bisect.bisect_left(self._starts, start.toordinal() - self._max_span)
+        last = bisect.bisect_right(self._starts, end.toordinal())
+        return [
+            event for event in self.events[first:last]
+            if event.end >= start and (kind is None or event.kind == kind)
+        ]
+
+    def for_symbols(self, symbols: list, start: date, end: date, kind: str = None) -> list:
+        """Returns the events of the given symbols that overlap the inclusive range [start, end]"""
+        results = []
+        for symbol in dict.fromkeys(symbol.upper() for symbol in symbols):
+            for position in self._by_symbol.get(symbol, []):
+                event = self.events[position]
+                if event.start > end:
+                    break
+                if event.end >= start and (kind is None or event.kind == kind):
+                    results.append(event)
+        return sorted(results, key=lambda event: (event.start, event.symbol))
+
+
+def parse_day(value: str) -> date:
+    """Converts a Finnhub date string (YYYY-MM-DD) to a date"""
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def build_calendar_index(earnings_data: dict, ipo_data: dict) -> IntervalIndex:
+    """Builds an interval index from the raw Finnhub earnings and IPO calendar responses"""
+    events = []
+    for entry in earnings_data.get("earningsCalendar", []) or []:
+        try:
+            day = parse_day(entry["date"])
+        except (KeyError, TypeError, ValueError):
+            logging.debug(f"Skipping malformed earnings entry: {entry}")
+            continue
+        if entry.get("symbol"):
+            events.append(CalendarEvent("earnings", entry["symbol"].upper(), day, day, entry))
+
+    for entry in ipo_data.get("ipoCalendar", []) or []:
+        try:
+            day = parse_day(entry["date"])
+        except (KeyError, TypeError, ValueError):
+            logging.debug(f"Skipping malformed IPO entry: {entry}")
+            continue
+        symbol = (entry.get("symbol") or entry.get("name") or "").upper()
+        if symbol:
+            events.append(CalendarEvent("ipo", symbol, day, day, entry))
+
+    return IntervalIndex(events)
@@ -0,0 +1,34 @@
+import discord
+import os
+import formatter
+from discord import app_commands
+from discord.ext import commands
+from dotenv import dotenv_values
+
+# Load the .env file from the parent directory
+env_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '.env')
+
+config = dotenv_values(env_path)
+for k, v in config.items():
+    if v:  # only set if not empty
+        os.environ.setdefault(k, v)
+
+# Define MY_GUILD_ID for testing, production will be None
+MY_GUILD_ID = os.getenv("MY_GUILD_ID", None)
+
+class AdminCog(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+
+    @app_commands.command(name="bot-stats", description="Returns the admission control counters of the bot")
+    @app_commands.guilds(discord.Object(id=MY_GUILD_ID))
+    @app_commands.default_permissions(administrator=True)
+    async def bot_stats(self, interaction: discord.Interaction) -> None:
+        embed = formatter.create_admission_stats_embed(self.bot.admission.stats())
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+
+# Setup for loading the cog
+async def setup(bot):
+    await bot.add_cog(AdminCog(bot))
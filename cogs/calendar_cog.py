@@ -0,0 +1,151 @@
+import asyncio
+import logging
+import finnhub
+import discord
+import os
+import formatter
+import calendar_index
+from discord import app_commands
+from discord.ext import commands, tasks
+from datetime import datetime, timedelta
+from api_keys import API_keys
+from dotenv import dotenv_values
+
+# Load the .env file from the parent directory
+env_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '.env')
+
+config = dotenv_values(env_path)
+for k, v in config.items():
+    if v:  # only set if not empty
+        os.environ.setdefault(k, v)
+
+# Define MY_GUILD_ID for testing, production will be None
+MY_GUILD_ID = os.getenv("MY_GUILD_ID", None)
+
+class CalendarCog(commands.Cog):
+    def __init__(self, bot):
+
+        # Check the validity of the API key before inializing this class
+        api_key = API_keys.get_finnhub_api_key()
+        if not api_key:
+            logging.error("Finnhub API key is missing or invalid.")
+            raise ValueError("Finnhub API key is not set. Please configure the API key.")
+        self.finnhub_client = finnhub.Client(api_key=api_key)
+
+        # Constants
+        self.DAYS_BEHIND = 7   # Keep last week's reports so the current week is always covered
+        self.DAYS_AHEAD = 30
+        self.REFRESH_HOURS = 24
+        self.MIN_RETRY_MINUTES = 2
+        self.MAX_RETRY_MINUTES = 60
+
+        self.bot = bot
+        self.index = None       # Will hold the latest calendar_index.IntervalIndex
+        self.refreshed_at = None
+        self.retry_minutes = None  # Set while retrying a failed refresh
+        self.refresh_calendar.start()  # Download the calendars now and once per day after
+
+
+    def cog_unload(self):
+        self.refresh_calendar.cancel()
+
+
+    def fetch_calendars(self) -> calendar_index.IntervalIndex:
+        """Bulk downloads the earnings and IPO calendars in two API calls and indexes them"""
+        today = datetime.utcnow().date()
+        start_date = (today - timedelta(days=self.DAYS_BEHIND)).strftime("%Y-%m-%d")
+        end_date = (today + timedelta(days=self.DAYS_AHEAD)).strftime("%Y-%m-%d")
+
+        earnings_data = self.finnhub_client.earnings_calendar(_from=start_date, to=end_date, symbol="")
+        ipo_data = self.finnhub_client.ipo_calendar(_from=start_date, to=end_date)
+        return calendar_index.build_calendar_index(earnings_data, ipo_data)
+
+
+    @tasks.loop(hours=24)
+    async def refresh_calendar(self):
+        """Refreshes the in-memory calendar index once per day, retrying with backoff after a failure"""
+        try:
+            # Run the blocking downloads off the event loop
+            index = await asyncio.to_thread(self.fetch_calendars)
+        except Exception as e:
+            # Retry sooner than the daily refresh, doubling the wait up to an hour
+            if self.retry_minutes is None:
+                self.retry_minutes = self.MIN_RETRY_MINUTES
+            else:
+                self.retry_minutes = min(self.retry_minutes * 2, self.MAX_RETRY_MINUTES)
+            logging.error(f"Error refreshing earnings and IPO calendars, retrying in {self.retry_minutes} minute(s): {e}")
+            self.refresh_calendar.change_interval(minutes=self.retry_minutes)
+            return
+
+        self.index = index
+        self.refreshed_at = datetime.now()
+        logging.info(f"Calendar refreshed with {len(index)} events")
+
+        # Back to the daily schedule once a retry succeeds
+        if self.retry_minutes is not None:
+            self.retry_minutes = None
+            self.refresh_calendar.change_interval(hours=self.REFRESH_HOURS)
+
+
+    @refresh_calendar.before_loop
+    async def before_refresh_calendar(self):
+        logging.info("Waiting for bot to be ready before starting the calendar_cog refresh loop")
+        await self.bot.wait_until_ready()
+
+
+    @staticmethod
+    def current_week():
+        """Returns the Monday and Sunday of the current week"""
+        today = datetime.now().date()
+        monday = today - timedelta(days=today.weekday())
+        return monday, monday + timedelta(days=6)
+
+
+    def create_earnings_today_embed(self) -> discord.Embed | None:
+        """Creates the earnings and IPO section for the morning digest, None if the calendar is not loaded"""
+        if self.index is None:
+            return None
+
+        today = datetime.now().date()
+        events = self.index.overlapping(today, today)
+        return formatter.create_earnings_calendar_embed(
+            title="Today's Earnings and IPOs",
+            description=f"{len(events)} companies are reporting or listing today",
+            events=events
+        )
+
+
+    @app_commands.command(name="earnings-week", description="Returns which of the given ticker symbols report earnings or IPO this week")
+    @app_commands.guilds(discord.Object(id=MY_GUILD_ID))
+    async def earnings_week(self, interaction: discord.Interaction, tickers: str) -> None:
+        # Accept comma or space separated ticker symbols
+        symbols = list(dict.fromkeys(ticker.upper() for ticker in tickers.replace(",", " ").split()))
+
+        # Prevents injection or invalid requests
+        if not symbols or not all(symbol.isalnum() for symbol in symbols):
+            await interaction.response.send_message("Invalid ticker symbols. Please use valid alphanumeric tickers separated by commas.")
+            return
+
+        if self.index is None:
+            await interaction.response.send_message("The earnings calendar is still loading. Please try again in a minute.")
+            return
+
+        try:
+            monday, sunday = self.current_week()
+            events = self.index.for_symbols(symbols, monday, sunday)
+            embed = formatter.create_earnings_calendar_embed(
+                title="Earnings and IPOs This Week",
+                description=f"{len({event.symbol for event in events})} of {len(symbols)} ticker(s) report between "
+                            f"{monday.strftime('%B %-d')} and {sunday.strftime('%B %-d')}",
+                events=events
+            )
+            await interaction.response.send_message(embed=embed)
+
+        except Exception as e:
+            logging.error(f"Error looking up the earnings calendar for {symbols}: {e}")
+            await interaction.response.send_message("An error occurred while looking up the earnings calendar. Please try again later.")
+
+
+# Setup for loading the cog
+async def setup(bot):
+    await bot.add_cog(CalendarCog(bot))
@@ -6,10 +6,14 @@ import finnhub
 import logging
 import plot_util
 import formatter
+import news_pager
+import response_pipeline
+from admission import admission_controlled
 from api_keys import API_keys
 from discord import app_commands
 from discord.ext import commands
 from dotenv import dotenv_values
+from zoneinfo import ZoneInfo
 
 # Load the .env file from the parent directory
 env_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '.env')
@@ -22,6 +26,35 @@ for k, v in config.items():
 MY_GUILD_ID = int(os.getenv("MY_GUILD_ID", None))
 
 
+# Chart ranges mapped to (calendar days to fetch, Finnhub candle resolution, trading sessions to keep).
+# Intraday ranges fetch extra days so weekends and holidays still contain enough sessions,
+# then keep only the most recent sessions. None keeps everything fetched.
+CHART_RANGES = {
+    "1D": (7, "1", 1),
+    "5D": (14, "5", 5),
+    "1M": (30, "15", None),
+    "6M": (182, "60", None),
+    "1Y": (365, "D", None),
+    "5Y": (365 * 5, "D", None),
+    "20Y": (365 * 20, "D", None),
+}
+
+# Exchange time zone used to group candles into trading sessions
+MARKET_TIMEZONE = ZoneInfo("America/New_York")
+
+
+def keep_last_sessions(data: dict, sessions: int) -> dict:
+    """Trims a Finnhub candle response to the candles of the last trading session dates"""
+    session_dates = [datetime.datetime.fromtimestamp(t, MARKET_TIMEZONE).date() for t in data["t"]]
+    unique_dates = sorted(set(session_dates))
+    if len(unique_dates) <= sessions:
+        return data
+
+    first_date = unique_dates[-sessions]
+    start = next(index for index, date in enumerate(session_dates) if date >= first_date)
+    return {key: data[key][start:] for key in ("c", "h", "l", "o", "t", "v") if key in data}
+
+
 class FinnhubCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
@@ -33,101 +66,112 @@ class FinnhubCog(commands.Cog):
             raise ValueError("Finnhub API key is not set. Please configure the API key.")
         self.finnhub_client = finnhub.Client(api_key=api_key)
 
+        # One cached result set per ticker and date window, shared by the paginated news views
+        self.news_cache = news_pager.NewsCache()
+        self.news_views = news_pager.NewsViewRegistry()
+
 
     @app_commands.command(name="get-quote", description="Returns the latest quote of the specified ticker symbol in green if postive and red if negative")
     @app_commands.guilds(discord.Object(id=MY_GUILD_ID))
+    @admission_controlled
     async def get_quote(self, interaction: discord.Interaction, ticker: str) -> None:
         ticker = ticker.upper()
 
         # Prevents injection or invalid requests
         if not ticker.isalnum():
-            await interaction.response.send_message("Invalid ticker symbol. Please use a valid alphanumeric ticker.")
+            await response_pipeline.reply(interaction, "Invalid ticker symbol. Please use a valid alphanumeric ticker.")
             return 
 
-        try:
-            # Lookup ticker symbol
-            data = self.finnhub_client.symbol_lookup(ticker)
-            if "count" in data and data["count"] > 0:
-
-                # Check for direct match
-                if any(ticker == result["symbol"] for result in data["result"]):
-                    data = self.finnhub_client.quote(ticker)
-
-                    # Package the quote data in an embed and return 
-                    embed = formatter.create_quote_embed(ticker, data)
-                    await interaction.response.send_message(embed=embed)
-
-                # Found indirect matches
+        async with response_pipeline.ProgressiveResponse(interaction, "get-quote") as response:
+            try:
+                # Lookup ticker symbol
+                data = await response.run("symbol lookup", self.finnhub_client.symbol_lookup, ticker)
+                if "count" in data and data["count"] > 0:
+
+                    # Check for direct match
+                    if any(ticker == result["symbol"] for result in data["result"]):
+                        data = await response.run("quote", self.finnhub_client.quote, ticker)
+
+                        # Package the quote data in an embed and return 
+                        embed = formatter.create_quote_embed(ticker, data)
+                        await response.send(embed=embed)
+
+                    # Found indirect matches
+                    else:
+                        message = f'Could not find a direct match.\nDid you mean: \n'
+                        count = 1
+                        for result in data["result"]:
+                            message += f'{count}: {result["symbol"]}, {result["description"]}\n'
+                            count += 1
+                        await response.send(content=message)
+
+                # Could not find any matches
                 else:
-                    response = f'Could not find a direct match.\nDid you mean: \n'
-                    count = 1
-                    for result in data["result"]:
-                        response += f'{count}: {result["symbol"]}, {result["description"]}\n'
-                        count += 1
-                    await interaction.response.send_message(response)
+                    await response.send(content="Cannot find a quote for that symbol.\nPlease check that the ticker symbol is correct.")
 
-            # Could not find any matches
-            else:
-                await interaction.response.send_message("Cannot find a quote for that symbol.\nPlease check that the ticker symbol is correct.")
-
-        except Exception as e:
-            logging.error(f"Error fetching quote for {ticker}: {e}")
-            await interaction.response.send_message("An error occurred while fetching the quote. Please try again later.")
+            except Exception as e:
+                logging.error(f"Error fetching quote for {ticker}: {e}")
+                await response.send(content="An error occurred while fetching the quote. Please try again later.")
 
 
     @app_commands.command(name="get-quote-rating", description="Returns bar and line chart of recommendation trends using Finnhub")
     @app_commands.guilds(discord.Object(id=MY_GUILD_ID))
+    @admission_controlled
     async def get_quote_rating(self, interaction: discord.Interaction, ticker: str) -> None:
         ticker = ticker.upper()
 
         # Prevents injections or invalid requests
         if not ticker.isalnum():
-            await interaction.response.send_message("Invalid ticker symbol. Please use a valid alphanumeric ticker.")
+            await response_pipeline.reply(interaction, "Invalid ticker symbol. Please use a valid alphanumeric ticker.")
             return 
 
-        try:
-            # Lookup ticker recommendation trends
-            data = self.finnhub_client.recommendation_trends(ticker)
-            if len(data) != 0:
-                sb = [item["strongBuy"] for item in data]
-                b = [item["buy"] for item in data]
-                h = [item["hold"] for item in data]
-                s = [item["sell"] for item in data]
-                ss = [item["strongSell"] for item in data]
-                dates = [item["period"] for item in data]
-
-                # Form recommendation trends graphs
-                recommendation_trends = plot_util.RecommendationTrends(sb, b, h, s, ss, dates)
-                bar_graph_image_path = plot_util.gen_bar_graph_recommended_trends(ticker, recommendation_trends)
-                line_graph_image_path = plot_util.gen_line_graph_recommended_trends(ticker, recommendation_trends)
-                with open(bar_graph_image_path, 'rb') as bar_file, open(line_graph_image_path, 'rb') as line_file:
-                    files = [
-                        discord.File(bar_file), 
-                        discord.File(line_file)
-                    ]
-                    await interaction.response.send_message(files=files)
-
-                # Remove the generated files
-                if os.path.exists(bar_graph_image_path):
-                    os.remove(bar_graph_image_path)
-                if os.path.exists(line_graph_image_path):
-                    os.remove(line_graph_image_path)
-                
-            else:
-                await interaction.response.send_message(f'Cannot find recommendation trend for {ticker}')
-        except Exception as e:
-            logging.error(f"Error fetching recommendation trends for {ticker}: {e}")
-            await interaction.response.send_message("An error occurred while fetching the recommendation trends. Please try again later.")
+        async with response_pipeline.ProgressiveResponse(interaction, "get-quote-rating") as response:
+            try:
+                # Lookup ticker recommendation trends
+                data = await response.run("recommendation trends", self.finnhub_client.recommendation_trends, ticker)
+                if len(data) != 0:
+                    sb = [item["strongBuy"] for item in data]
+                    b = [item["buy"] for item in data]
+                    h = [item["hold"] for item in data]
+                    s = [item["sell"] for item in data]
+                    ss = [item["strongSell"] for item in data]
+                    dates = [item["period"] for item in data]
+
+                    # Send the latest consensus right away while the graphs render
+                    latest = data[0]
+                    await response.send(content=(
+                        f'**{ticker} analyst consensus for {latest["period"]}**\n'
+                        f'Strong Buy: {latest["strongBuy"]} | Buy: {latest["buy"]} | Hold: {latest["hold"]} | '
+                        f'Sell: {latest["sell"]} | Strong Sell: {latest["strongSell"]}'
+                    ))
+
+                    # Form recommendation trends graphs and add each one as it finishes
+                    recommendation_trends = plot_util.RecommendationTrends(sb, b, h, s, ss, dates)
+                    attachments = []
+                    for stage, gen_graph in (
+                        ("bar graph", plot_util.gen_bar_graph_recommended_trends),
+                        ("line graph", plot_util.gen_line_graph_recommended_trends)
+                    ):
+                        image = await response.render(stage, gen_graph, ticker, recommendation_trends)
+                        message = await response.send(files=attachments + [discord.File(image, filename=image.name)])
+                        attachments = list(message.attachments)  # Keep what is already uploaded
+                    
+                else:
+                    await response.send(content=f'Cannot find recommendation trend for {ticker}')
+            except Exception as e:
+                logging.error(f"Error fetching recommendation trends for {ticker}: {e}")
+                await response.send(content="An error occurred while fetching the recommendation trends. Please try again later.")
 
 
-    @app_commands.command(name="get-company-news", description="Returns up to 10 news articles within the past week based on a specific ticker using Finnhub")
+    @app_commands.command(name="get-company-news", description="Returns paginated news articles within the past week based on a specific ticker using Finnhub")
     @app_commands.guilds(discord.Object(id=MY_GUILD_ID))
+    @admission_controlled
     async def get_company_news(self, interaction: discord.Interaction, ticker: str) -> None:
         ticker = ticker.upper()
 
         # Prevents injections or invalid requests
         if not ticker.isalnum():
-            await interaction.response.send_message("Invalid ticker symbol. Please use a valid alphanumeric ticker.")
+            await response_pipeline.reply(interaction, "Invalid ticker symbol. Please use a valid alphanumeric ticker.")
             return 
 
         # Define the date range for the past week
@@ -138,65 +182,129 @@ class FinnhubCog(commands.Cog):
         start_date = last_week.strftime("%Y-%m-%d")
         end_date = today.strftime("%Y-%m-%d")
         
-        try:
-            news_data = self.finnhub_client.company_news(ticker, _from=start_date, to=end_date)
-            
-            # Limit the results to a maximum of 10 articles
-            top_articles = news_data[:10]
-
-            if not top_articles:
-                embed = discord.Embed(
-                    title=f"No News for {ticker}",
-                    description="There are no recent articles available.",
-                    color=discord.Color.red()
+        async with response_pipeline.ProgressiveResponse(interaction, "get-company-news") as response:
+            try:
+                # Reuse the result set for this ticker and window if we already fetched it
+                cache_key = (ticker, start_date, end_date)
+                news_data = self.news_cache.get(cache_key)
+                if news_data is None:
+                    news_data = await response.run("company news", self.finnhub_client.company_news, ticker, _from=start_date, to=end_date)
+                    news_data = sorted(news_data, key=lambda article: -article["datetime"])
+                    self.news_cache.put(cache_key, news_data)
+
+                if not news_data:
+                    embed = discord.Embed(
+                        title=f"No News for {ticker}",
+                        description="There are no recent articles available.",
+                        color=discord.Color.red()
+                    )
+                    await response.send(embed=embed)
+                    return
+
+                view = news_pager.NewsPaginatorView(
+                    ticker, 
+                    news_data, 
+                    end_date=datetime.datetime.now(), 
+                    on_evict=self.news_views.remove
                 )
-            else:
-                embed = discord.Embed(
-                    title=f"Latest news for {ticker}",
-                    description=f"Here are the top {len(top_articles)} news articles from the past week",
-                    color=discord.Color.green()
-                )
-                formatter.embed_news_template(top_articles, embed)
-            
-            await interaction.response.send_message(embed=embed)
+                for evicted_view in self.news_views.add(view):
+                    await evicted_view.close()
 
-        except Exception as e:
-            logging.error(f"Error fetching company news for {ticker}: {e}")
-            await interaction.response.send_message("An error occurred while fetching company news. Please try again later.")
+                view.message = await response.send(embed=view.build_embed(), view=view)
+
+            except Exception as e:
+                logging.error(f"Error fetching company news for {ticker}: {e}")
+                await response.send(content="An error occurred while fetching company news. Please try again later.")
 
 
     @app_commands.command(name="get-capm", description="Generates the expected return of a stock using the Capital Asset Pricing Model (CAPM)")
     @app_commands.guilds(discord.Object(id=MY_GUILD_ID))
-    async def get_company_news(self, interaction: discord.Interaction, ticker: str) -> None:
+    @admission_controlled
+    async def get_capm(self, interaction: discord.Interaction, ticker: str) -> None:
         ticker = ticker.upper()
 
         # Prevents injections or invalid requests
         if not ticker.isalnum():
-            await interaction.response.send_message("Invalid ticker symbol. Please use a valid alphanumeric ticker.")
+            await response_pipeline.reply(interaction, "Invalid ticker symbol. Please use a valid alphanumeric ticker.")
             return 
         
-        try:
-            financials = self.finnhub_client.company_basic_financials(ticker, "all")
+        async with response_pipeline.ProgressiveResponse(interaction, "get-capm") as response:
+            try:
+                financials = await response.run("basic financials", self.finnhub_client.company_basic_financials, ticker, "all")
+
+                # Extract the beta value
+                beta = financials.get("metric", {}).get("beta")
+                if beta is None:
+                    await response.send(content=f"Beta value not available for {ticker}.")
+                    return
+                
+                # Calculate the market risk premium
+                risk_free_rate = 4.77
+                market_return = 8.00
+                market_risk_premium = market_return - risk_free_rate
+                
+                # Apply the CAPM formula 
+                capm_return = risk_free_rate + beta * market_risk_premium
 
-            # Extract the beta value
-            beta = financials.get("metric", {}).get("beta")
-            if beta is None:
-                await interaction.response.send_message(f"Beta value not available for {ticker}.")
+                embed = formatter.create_capm_embed(ticker, beta, risk_free_rate, market_return, capm_return)
+                await response.send(embed=embed)
             
-            # Calculate the market risk premium
-            risk_free_rate = 4.77
-            market_return = 8.00
-            market_risk_premium = market_return - risk_free_rate
-            
-            # Apply the CAPM formula 
-            capm_return = risk_free_rate + beta * market_risk_premium
+            except Exception as e:
+                logging.error(f"Error fetching Capital Asset Pricing Model for {ticker}: {e}")
+                await response.send(content="An error occurred while fetching Capital Asset Pricing Model. Please try again later.")
 
-            embed = formatter.create_capm_embed(ticker, beta, risk_free_rate, market_return, capm_return)
-            await interaction.response.send_message(embed=embed)
-        
-        except Exception as e:
-            logging.error(f"Error fetching Capital Asset Pricing Model for {ticker}: {e}")
-            await interaction.response.send_message("An error occurred while fetching Capital Asset Pricing Model. Please try again later.")
+
+    @app_commands.command(name="get-chart", description="Returns a price chart of the specified ticker symbol over a time range using Finnhub")
+    @app_commands.guilds(discord.Object(id=MY_GUILD_ID))
+    @app_commands.choices(time_range=[app_commands.Choice(name=label, value=label) for label in CHART_RANGES])
+    @admission_controlled
+    async def get_chart(self, interaction: discord.Interaction, ticker: str, time_range: str = "1Y", volume: bool = False) -> None:
+        ticker = ticker.upper()
+
+        # Prevents injections or invalid requests
+        if not ticker.isalnum():
+            await response_pipeline.reply(interaction, "Invalid ticker symbol. Please use a valid alphanumeric ticker.")
+            return 
+
+        async with response_pipeline.ProgressiveResponse(interaction, "get-chart") as response:
+            try:
+                # Define the time range of the candles
+                days, resolution, sessions = CHART_RANGES[time_range]
+                now = datetime.datetime.now()
+                start_time = int((now - datetime.timedelta(days=days)).timestamp())
+                end_time = int(now.timestamp())
+
+                data = await response.run("candles", self.finnhub_client.stock_candles, ticker, resolution, start_time, end_time)
+                if data.get("s") != "ok" or not data.get("c"):
+                    await response.send(content=f'Cannot find price history for {ticker}')
+                    return
+
+                # Keep only the most recent trading sessions for intraday ranges
+                if sessions:
+                    data = keep_last_sessions(data, sessions)
+
+                # Send the price change over the range while the chart renders
+                first_close, last_close = data["c"][0], data["c"][-1]
+                percent_change = (last_close - first_close) / first_close * 100 if first_close else 0
+                await response.send(content=(
+                    f'**{ticker} ({time_range})**: ${last_close:.2f} '
+                    f'({"⬆️" if percent_change > 0 else "⬇️" if percent_change < 0 else "➖"} {percent_change:.2f}%)'
+                ))
+
+                image = await response.render(
+                    "price chart", 
+                    plot_util.gen_price_chart, 
+                    ticker, 
+                    data["t"], 
+                    data["c"], 
+                    data["v"] if volume else None, 
+                    f"({time_range})"
+                )
+                await response.send(files=[discord.File(image, filename=image.name)])
+
+            except Exception as e:
+                logging.error(f"Error fetching price chart for {ticker}: {e}")
+                await response.send(content="An error occurred while fetching the price chart. Please try again later.")
 
 
 # Setup is required for entry point
@@ -1,8 +1,11 @@
+import asyncio
 import logging
 import finnhub
 import discord
 import os
 import formatter
+import response_pipeline
+from admission import admission_controlled
 from discord import app_commands
 from discord.ext import commands, tasks
 from datetime import datetime, timedelta
@@ -75,6 +78,17 @@ class ScheduledTaskCog(commands.Cog):
                 # Send the scheduled message
                 embed = await self.fetch_and_format_market_news()
                 await self.channel.send(embed=embed)
+
+                # Send today's earnings and IPOs as a separate message if the calendar has been loaded,
+                # Discord's 6000 character limit applies to all embeds of a message combined
+                calendar_cog = self.bot.get_cog("CalendarCog")
+                if calendar_cog:
+                    try:
+                        earnings_embed = calendar_cog.create_earnings_today_embed()
+                        if earnings_embed:
+                            await self.channel.send(embed=earnings_embed)
+                    except Exception as e:
+                        logging.error(f"Error sending the earnings and IPO digest: {e}")
             
                 # Schedule for the next day
                 self.message_time += timedelta(days=1)
@@ -115,7 +129,7 @@ class ScheduledTaskCog(commands.Cog):
         try:
             # Step 1: Fetch all market news
             logging.debug("Retrieving market news")
-            news_data = self.finnhub_client.general_news('general')
+            news_data = await asyncio.to_thread(self.finnhub_client.general_news, 'general')
             if len(news_data) == 0:
                 embed = discord.Embed(
                     title="Market News",
@@ -164,10 +178,12 @@ class ScheduledTaskCog(commands.Cog):
 
     @app_commands.command(name="get-market-news", description="Returns 10 news articles on the stock market within the last 24 hours")
     @app_commands.guilds(discord.Object(id=MY_GUILD_ID))
+    @admission_controlled
     async def get_market_news(self, interaction: discord.Interaction):
         logging.debug("get-market-news command is being executed")
-        embed = await self.fetch_and_format_market_news()
-        await interaction.response.send_message(embed=embed)
+        async with response_pipeline.ProgressiveResponse(interaction, "get-market-news") as response:
+            embed = await response.run_async("market news", self.fetch_and_format_market_news())
+            await response.send(embed=embed)
             
 
 # Setup for loading the cog
@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import finnhub
+import discord
+import os
+import formatter
+import fundamentals
+import numpy as np
+from discord import app_commands
+from discord.ext import commands, tasks
+from api_keys import API_keys
+from dotenv import dotenv_values
+
+# Load the .env file from the parent directory
+env_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '.env')
+
+config = dotenv_values(env_path)
+for k, v in config.items():
+    if v:  # only set if not empty
+        os.environ.setdefault(k, v)
+
+# Define MY_GUILD_ID for testing, production will be None
+MY_GUILD_ID = os.getenv("MY_GUILD_ID", None)
+
+# Default universe (Dow Jones Industrial Average) used when SCREENER_UNIVERSE is not set
+DEFAULT_UNIVERSE = [
+    "AAPL", "AMGN", "AMZN", "AXP", "BA", "CAT", "CRM", "CSCO", "CVX", "DIS",
+    "GS", "HD", "HON", "IBM", "JNJ", "JPM", "KO", "MCD", "MMM", "MRK",
+    "MSFT", "NKE", "NVDA", "PG", "SHW", "TRV", "UNH", "V", "VZ", "WMT"
+]
+
+
+class ScreenerCog(commands.Cog):
+    def __init__(self, bot):
+
+        # Check the validity of the API key before inializing this class
+        api_key = API_keys.get_finnhub_api_key()
+        if not api_key:
+            logging.error("Finnhub API key is missing or invalid.")
+            raise ValueError("Finnhub API key is not set. Please configure the API key.")
+        self.finnhub_client = finnhub.Client(api_key=api_key)
+
+        # Constants, the universe is a comma separated list of ticker symbols
+        universe = os.getenv("SCREENER_UNIVERSE")
+        self.UNIVERSE = [symbol.strip().upper() for symbol in universe.split(",") if symbol.strip()] if universe else DEFAULT_UNIVERSE
+        self.CALLS_PER_MINUTE = int(os.getenv("SCREENER_CALLS_PER_MINUTE", 30))  # Leave room in the 60/min limit for commands
+        self.MAX_RESULTS = 24
+
+        self.bot = bot
+        self.metrics_by_symbol = {}  # Latest raw metrics per symbol, kept between refreshes
+        self.snapshot = None         # Will hold the latest fundamentals.FundamentalsSnapshot
+        self.budget = fundamentals.RateBudget(self.CALLS_PER_MINUTE)
+        self.refresh_snapshot.start()
+
+
+    def cog_unload(self):
+        self.refresh_snapshot.cancel()
+
+
+    async def publish_snapshot(self, metrics_by_symbol: dict) -> None:
+        """Builds a new columnar snapshot off the event loop and swaps it in when done"""
+        if metrics_by_symbol:
+            # Copy the outer dict so the refresh can keep adding symbols while the snapshot builds
+            self.snapshot = await asyncio.to_thread(fundamentals.FundamentalsSnapshot, dict(metrics_by_symbol))
+
+
+    @tasks.loop(hours=12)
+    async def refresh_snapshot(self):
+        """Refreshes the basic financials of the whole universe under the rate budget"""
+        logging.info(f"Refreshing fundamentals for {len(self.UNIVERSE)} symbols at {self.CALLS_PER_MINUTE} calls per minute")
+        try:
+            await fundamentals.refresh_fundamentals(
+                self.finnhub_client,
+                self.UNIVERSE,
+                self.budget,
+                self.metrics_by_symbol,
+                on_progress=self.publish_snapshot
+            )
+            logging.info(f"Fundamentals snapshot refreshed with {len(self.snapshot) if self.snapshot else 0} symbols")
+        except Exception as e:
+            logging.error(f"Error refreshing fundamentals snapshot: {e}")
+
+
+    @refresh_snapshot.before_loop
+    async def before_refresh_snapshot(self):
+        logging.info("Waiting for bot to be ready before starting the screener_cog refresh loop")
+        await self.bot.wait_until_ready()
+
+
+    @app_commands.command(name="screen", description="Screens stocks by basic financials, e.g. 'peTTM < 20 and beta > 1.2'")
+    @app_commands.guilds(discord.Object(id=MY_GUILD_ID))
+    async def screen(self, interaction: discord.Interaction, expression: app_commands.Range[str, 1, 200]) -> None:
+        snapshot = self.snapshot
+        if snapshot is None:
+            await interaction.response.send_message("The fundamentals snapshot is still loading. Please try again in a few minutes.")
+            return
+
+        try:
+            screen = fundamentals.compile_screen(expression.strip())
+            mask = screen.mask(snapshot)
+        except ValueError as e:
+            await interaction.response.send_message(
+                f"{e}\nExample: `peTTM < 20 and beta > 1.2`",
+                ephemeral=True,
+                allowed_mentions=discord.AllowedMentions.none()  # Never ping from user supplied text
+            )
+            return
+
+        try:
+            matches = np.flatnonzero(mask)
+            rows = [
+                (snapshot.symbols[row], {name: snapshot.columns[name][row] for name in screen.metrics})
+                for row in matches[:self.MAX_RESULTS]
+            ]
+            embed = formatter.create_screen_embed(expression, rows, len(matches), len(snapshot), snapshot.refreshed_at)
+            await interaction.response.send_message(embed=embed)
+
+        except Exception as e:
+            logging.error(f"Error running screen '{expression}': {e}")
+            await interaction.response.send_message("An error occurred while running the screen. Please try again later.")
+
+
+# Setup for loading the cog
+async def setup(bot):
+    await bot.add_cog(ScreenerCog(bot))
@@ -94,3 +94,99 @@ def embed_news_template(articles: list, embed: Embed) -> None:
     # Add timestamp and footer
     create_embed_footer(embed)
 
+
+
+def create_earnings_calendar_embed(title: str, description: str, events: list) -> Embed:
+    """Returns an embedded response listing calendar events grouped by day"""
+
+    # Create the embed
+    embed = Embed(title=title, description=description, color=Color.blue())
+
+    # Finnhub reports the time of day as bmo (before market open), amc (after market close) or dmh
+    hour_labels = {"bmo": "🌅", "amc": "🌙", "dmh": "☀️"}
+
+    # Group the events by day
+    days = {}
+    for event in events:
+        days.setdefault(event.start, []).append(event)
+
+    # Discord allows 25 fields per embed and 6000 characters in total, so keep each day short
+    for day, day_events in list(days.items())[:25]:
+        lines = []
+        for event in day_events:
+            if event.kind == "ipo":
+                price = event.data.get("price") or "TBD"
+                lines.append(f"🆕 **{event.symbol}** IPO ({event.data.get('exchange') or 'Unknown'}) @ {price}")
+            else:
+                estimate = event.data.get("epsEstimate")
+                estimate_text = f" EPS est. {estimate:.2f}" if isinstance(estimate, (int, float)) else ""
+                lines.append(f"{hour_labels.get(event.data.get('hour'), '📅')} **{event.symbol}**{estimate_text}")
+
+        value = ""
+        for count, line in enumerate(lines):
+            if len(value) + len(line) + 30 > 800:
+                value += f"...and {len(lines) - count} more"
+                break
+            value += line + "\n"
+        embed.add_field(name=day.strftime("%A, %B %-d"), value=value, inline=False)
+
+    if not events:
+        embed.add_field(name="No events", value="Nothing is scheduled for this period.", inline=False)
+
+    create_embed_footer(embed)
+    return embed
+
+
+def create_screen_embed(expression: str, rows: list, match_count: int, universe_size: int, refreshed_at: datetime) -> Embed:
+    """
+    Returns an embedded response for a stock screen.
+    Each row is a (symbol, {metric: value}) pair for the metrics used in the expression.
+    """
+
+    # Create the embed
+    embed = Embed(
+        title="🔎 Stock Screen",
+        description=f"`{expression}`\n"
+                    f"{match_count} of {universe_size} symbols match "
+                    f"(fundamentals from {refreshed_at.strftime('%Y-%m-%d at %-I:%M %p')})",
+        color=Color.blue() if match_count else Color.red()
+    )
+
+    # Add a field for each matching symbol
+    for symbol, values in rows:
+        embed.add_field(
+            name=symbol,
+            value="\n".join(f"{name}: {value:.2f}" for name, value in values.items()) or "\u200b",
+            inline=True
+        )
+
+    if match_count > len(rows):
+        embed.add_field(name="\u200b", value=f"...and {match_count - len(rows)} more", inline=False)
+
+    create_embed_footer(embed)
+    return embed
+
+
+def create_admission_stats_embed(stats: dict) -> Embed:
+    """Returns an embedded response with the admission control counters"""
+
+    # Create the embed
+    embed = Embed(
+        title="⚙️ StockBot Load",
+        description="Admission control counters since the bot started",
+        color=Color.blue()
+    )
+
+    # Add fields
+    embed.add_field(name="Running", value=str(stats["running"]), inline=True)
+    embed.add_field(name="Queued", value=str(stats["queued"]), inline=True)
+    embed.add_field(name="Admitted", value=str(stats["admitted"]), inline=True)
+    embed.add_field(
+        name="Rejected",
+        value="\n".join(f"{reason}: {count}" for reason, count in stats["rejected"].items()) or "0",
+        inline=True
+    )
+    embed.add_field(name="Average Run Time", value=f"{stats['service_time']:.2f}s", inline=True)
+
+    create_embed_footer(embed)
+    return embed
@@ -0,0 +1,206 @@
+# This file stores a columnar snapshot of basic financials and compiles screen expressions against it
+
+import ast
+import time
+import asyncio
+import logging
+import functools
+import numpy as np
+import pandas as pd
+from datetime import datetime
+
+
+class FundamentalsSnapshot():
+    """
+    Column-oriented view of the Finnhub basic financials for a universe of symbols.
+    Each metric is a float64 NumPy array aligned with self.symbols, with NaN where
+    a symbol does not report the metric.
+
+    Metrics starting with a digit (e.g. 52WeekHigh) are also stored with a leading
+    underscore (e.g. _52WeekHigh) so they can be used in screen expressions.
+    """
+    def __init__(self, metrics_by_symbol: dict):
+        # One row per symbol and one column per metric, only numeric metrics are kept
+        # since Finnhub mixes in a few strings and dates
+        frame = pd.DataFrame.from_dict(metrics_by_symbol, orient="index").sort_index()
+        frame = frame.select_dtypes("number")
+
+        self.symbols = frame.index.to_numpy(dtype=object)
+        self.refreshed_at = datetime.now()
+
+        self.columns = {}
+        for name in frame.columns:
+            column = frame[name].to_numpy(dtype=np.float64)
+            self.columns[str(name)] = column
+            if str(name)[0].isdigit():
+                self.columns["_" + str(name)] = column
+
+    def __len__(self):
+        return len(self.symbols)
+
+
+class ScreenExpression():
+    """
+    Compiles a screen expression such as 'peTTM < 20 and beta > 1.2' once into a
+    tree of vectorized NumPy operations. Only metric names, numbers, arithmetic,
+    comparisons and and/or/not are allowed, nothing is passed to eval.
+    """
+    COMPARATORS = {
+        ast.Lt: np.less,
+        ast.LtE: np.less_equal,
+        ast.Gt: np.greater,
+        ast.GtE: np.greater_equal,
+        ast.Eq: np.equal,
+        ast.NotEq: np.not_equal,
+    }
+    ARITHMETIC = {
+        ast.Add: np.add,
+        ast.Sub: np.subtract,
+        ast.Mult: np.multiply,
+        ast.Div: np.true_divide,
+    }
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        self.metrics = []  # Metric names in order of appearance
+        try:
+            tree = ast.parse(expression, mode="eval")
+            self._evaluate, is_boolean = self._compile(tree.body)
+        except SyntaxError as e:
+            raise ValueError(f"Invalid screen expression: {e.msg}") from e
+        except (RecursionError, MemoryError) as e:
+            raise ValueError("Screen expression is too complex.") from e
+        if not is_boolean:
+            raise ValueError("A screen expression must be a comparison, e.g. 'peTTM < 20'.")
+
+    def _compile(self, node):
+        """Returns (function of the columns, whether the result is boolean) for an AST node"""
+        if isinstance(node, ast.BoolOp):
+            operands = [self._compile_boolean(value) for value in node.values]
+            combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+            return (lambda columns: functools.reduce(combine, (operand(columns) for operand in operands))), True
+
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+            operand = self._compile_boolean(node.operand)
+            return (lambda columns: np.logical_not(operand(columns))), True
+
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+            operand = self._compile_number(node.operand)
+            return (lambda columns: np.negative(operand(columns))), False
+
+        if isinstance(node, ast.Compare):
+            # Chained comparisons (1 < beta < 2) become (1 < beta) and (beta < 2)
+            operands = [self._compile_number(node.left)] + [self._compile_number(value) for value in node.comparators]
+            comparisons = []
+            for position, op in enumerate(node.ops):
+                if type(op) not in self.COMPARATORS:
+                    raise ValueError(f"Unsupported comparison in screen expression: {type(op).__name__}")
+                comparisons.append((self.COMPARATORS[type(op)], operands[position], operands[position + 1]))
+            return (lambda columns: functools.reduce(
+                np.logical_and,
+                (compare(left(columns), right(columns)) for compare, left, right in comparisons)
+            )), True
+
+        if isinstance(node, ast.BinOp):
+            if type(node.op) not in self.ARITHMETIC:
+                raise ValueError(f"Unsupported operator in screen expression: {type(node.op).__name__}")
+            apply = self.ARITHMETIC[type(node.op)]
+            left = self._compile_number(node.left)
+            right = self._compile_number(node.right)
+            return (lambda columns: apply(left(columns), right(columns))), False
+
+        if isinstance(node, ast.Name):
+            name = node.id
+            if name not in self.metrics:
+                self.metrics.append(name)
+            return (lambda columns: columns[name]), False
+
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+            value = float(node.value)
+            return (lambda columns: value), False
+
+        # Only name the rejected construct, the user's input is never echoed back
+        raise ValueError(f"Unsupported syntax in screen expression: {self.describe(node)} are not allowed.")
+
+    @staticmethod
+    def describe(node) -> str:
+        """Returns a readable name for a kind of AST node"""
+        if isinstance(node, ast.Constant):
+            return "string literals" if isinstance(node.value, (str, bytes)) else f"{type(node.value).__name__} literals"
+        names = {
+            ast.Call: "function calls",
+            ast.Attribute: "attributes",
+            ast.Subscript: "subscripts",
+            ast.Lambda: "lambdas",
+            ast.IfExp: "conditional expressions",
+        }
+        return names.get(type(node), f"{type(node).__name__} expressions")
+
+    def _compile_boolean(self, node):
+        function, is_boolean = self._compile(node)
+        if not is_boolean:
+            raise ValueError("Expected a comparison but got a number or metric, e.g. use 'beta > 1' instead of 'beta'.")
+        return function
+
+    def _compile_number(self, node):
+        function, is_boolean = self._compile(node)
+        if is_boolean:
+            raise ValueError("Expected a number or metric but got a comparison.")
+        return function
+
+    def mask(self, snapshot: FundamentalsSnapshot) -> np.ndarray:
+        """Evaluates the expression over every symbol and returns a boolean mask"""
+        missing = [name for name in self.metrics if name not in snapshot.columns]
+        if missing:
+            raise ValueError(f"Unknown metric(s): {', '.join(missing)}")
+
+        with np.errstate(all="ignore"):
+            result = np.broadcast_to(np.asarray(self._evaluate(snapshot.columns), dtype=bool), (len(snapshot),))
+
+        # Symbols missing any metric used in the expression never match, even under 'not' or '!='
+        for name in self.metrics:
+            result = result & ~np.isnan(snapshot.columns[name])
+        return result
+
+
+@functools.lru_cache(maxsize=128)
+def compile_screen(expression: str) -> ScreenExpression:
+    """Compiles and caches a screen expression"""
+    return ScreenExpression(expression)
+
+
+class RateBudget():
+    """Spaces out upstream calls so a background job stays under its share of the API limit"""
+    def __init__(self, calls_per_minute: int):
+        self.interval = 60 / calls_per_minute
+        self._next_call = 0.0
+
+    async def wait(self) -> None:
+        now = time.monotonic()
+        if self._next_call > now:
+            await asyncio.sleep(self._next_call - now)
+        self._next_call = max(now, self._next_call) + self.interval
+
+
+async def refresh_fundamentals(finnhub_client, symbols: list, budget: RateBudget, metrics_by_symbol: dict,
+                               on_progress=None, publish_every: int = 100) -> None:
+    """
+    Refreshes the basic financials of each symbol into metrics_by_symbol under the rate budget.
+    on_progress is awaited with metrics_by_symbol every publish_every symbols and once at the end.
+    """
+    for count, symbol in enumerate(symbols, start=1):
+        await budget.wait()
+        try:
+            # Run the blocking request off the event loop
+            financials = await asyncio.to_thread(finnhub_client.company_basic_financials, symbol, "all")
+            metrics = financials.get("metric") or {}
+            if metrics:
+                metrics_by_symbol[symbol] = metrics
+        except Exception as e:
+            logging.warning(f"Error refreshing basic financials for {symbol}: {e}")
+
+        if on_progress and count % publish_every == 0:
+            await on_progress(metrics_by_symbol)
+
+    if on_progress:
+        await on_progress(metrics_by_symbol)
@@ -0,0 +1,89 @@
+# This file sets up non-blocking logging with per-interaction trace IDs
+
+import os
+import queue
+import uuid
+import random
+import logging
+import contextvars
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+# Trace ID of the interaction currently being handled, copied into worker threads by asyncio.to_thread
+trace_id_var = contextvars.ContextVar("trace_id", default="-")
+
+LOG_FORMAT = '[%(asctime)s] %(name)s [%(levelname)s] [%(trace_id)s]: %(message)s'
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def new_trace_id() -> str:
+    """Starts a new trace for the current task and returns its ID"""
+    trace_id = uuid.uuid4().hex[:12]
+    trace_id_var.set(trace_id)
+    return trace_id
+
+
+class TraceIdFilter(logging.Filter):
+    """Stamps each record with the trace ID of the context that logged it"""
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.trace_id = trace_id_var.get()
+        return True
+
+
+class DebugSampler(logging.Filter):
+    """
+    Keeps only a fraction of DEBUG records so debug logging can stay on in production.
+    Sampling is decided per trace, so a sampled interaction keeps all of its debug records.
+    Records at INFO and above always pass.
+    """
+    def __init__(self, sample_rate: float):
+        super().__init__()
+        self.sample_rate = sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self.sample_rate >= 1:
+            return True
+        if self.sample_rate <= 0:
+            return False
+
+        trace_id = getattr(record, "trace_id", "-")
+        if trace_id == "-":
+            return random.random() < self.sample_rate
+        return int(trace_id, 16) % 10000 < self.sample_rate * 10000
+
+
+def setup_logging(log_directory: str, debug_sample_rate: float = 0.0, max_bytes: int = 5 * 1024 * 1024,
+                  backup_count: int = 5) -> QueueListener:
+    """
+    Routes every log record through a queue to a background thread that writes to a
+    rotating file and the console, so logging never blocks the event loop.
+    Returns the listener, which should be stopped on shutdown to flush the queue.
+    """
+    os.makedirs(log_directory, exist_ok=True)
+    formatter = logging.Formatter(fmt=LOG_FORMAT, datefmt=DATE_FORMAT)
+
+    # Slow handlers only run on the listener thread
+    file_handler = RotatingFileHandler(
+        filename=os.path.join(log_directory, 'bot.log'),
+        maxBytes=max_bytes,
+        backupCount=backup_count,
+        encoding='utf-8'
+    )
+    stream_handler = logging.StreamHandler()  # Also log to the console
+    for handler in (file_handler, stream_handler):
+        handler.setFormatter(formatter)
+
+    # The queue handler stamps and samples records in the caller before enqueueing them
+    log_queue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.addFilter(TraceIdFilter())
+    queue_handler.addFilter(DebugSampler(debug_sample_rate))
+
+    root_logger = logging.getLogger()
+    for handler in root_logger.handlers[:]:
+        root_logger.removeHandler(handler)
+    root_logger.addHandler(queue_handler)
+    root_logger.setLevel(logging.DEBUG if debug_sample_rate > 0 else logging.INFO)
+
+    listener = QueueListener(log_queue, file_handler, stream_handler, respect_handler_level=True)
+    listener.start()
+    return listener
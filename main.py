@@ -3,17 +3,38 @@
 import os
 import discord
 import logging
+import traceback
+import log_util
+from discord import app_commands
 from discord.ext import commands
 from dotenv import dotenv_values
 from api_keys import API_keys
+from admission import AdmissionController
+
+class TracedCommandTree(app_commands.CommandTree):
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        """Starts a trace for each interaction, the command runs in the same task so its logs carry the ID"""
+        trace_id = log_util.new_trace_id()
+        interaction.extras["trace_id"] = trace_id
+        logging.debug(f"Interaction {interaction.id} from user {interaction.user.id} in guild {interaction.guild_id}")
+        return True
+
 
 class MyBot(commands.Bot):
     def __init__(self, intents):
-        super().__init__(command_prefix='/', intents=intents)
+        super().__init__(command_prefix='/', intents=intents, tree_cls=TracedCommandTree)
 
         # In case we want to do something guild specific
         self.MY_GUILD = discord.Object(id=int(os.getenv('MY_GUILD_ID')))  
 
+        # Limits concurrent expensive commands per user and guild, see admission.py
+        self.admission = AdmissionController(
+            max_per_user=int(os.getenv('ADMISSION_MAX_PER_USER', 2)),
+            max_per_guild=int(os.getenv('ADMISSION_MAX_PER_GUILD', 4)),
+            max_concurrent=int(os.getenv('ADMISSION_MAX_CONCURRENT', 8)),
+            latency_budget=float(os.getenv('ADMISSION_LATENCY_BUDGET', 2.5))
+        )
+
 
     async def setup_hook(self):
         logging.info("Setup hook started.")
@@ -70,19 +91,12 @@ def main():
     API_keys.set_alpha_vantage_api_key(os.getenv('ALPHA_VANTAGE_API_KEY'))
     API_keys.set_finnhub_api_key(os.getenv('FINNHUB_API_KEY'))
 
-    # Create the log directory if it doesn't exist
-    log_directory = 'logs'
-    os.makedirs(log_directory, exist_ok=True) 
-    
-    # Configure logging
-    logging.basicConfig(
-        level=logging.INFO,  # Set the log level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
-        format='[%(asctime)s] %(name)s [%(levelname)s]: %(message)s',  # Log format
-        datefmt='%Y-%m-%d %H:%M:%S',  # Date format
-        handlers=[
-            logging.FileHandler(filename=os.path.join(log_directory, 'bot.log'), encoding='utf-8', mode='w'),
-            logging.StreamHandler()  # Also log to the console
-        ]
+    # Configure logging, records are written by a background thread and the log file rotates by size
+    listener = log_util.setup_logging(
+        log_directory='logs',
+        debug_sample_rate=float(os.getenv('LOG_DEBUG_SAMPLE_RATE', 0)),  # Fraction of traces that log at DEBUG
+        max_bytes=int(os.getenv('LOG_MAX_BYTES', 5 * 1024 * 1024)),
+        backup_count=int(os.getenv('LOG_BACKUP_COUNT', 5))
     )
 
     # Get the Discord logger
@@ -95,7 +109,11 @@ def main():
 
     # Load the cog and run the bot, set root_logger to True to enable logging for all loggers
     bot = MyBot(intents=intents)
-    bot.run(os.getenv('TOKEN'))
+    try:
+        # Keep our logging setup instead of letting discord.py install its own handler
+        bot.run(os.getenv('TOKEN'), log_handler=None)
+    finally:
+        listener.stop()  # Flush any queued records
 
 
 if __name__ == "__main__":
@@ -0,0 +1,222 @@
+# This file caches company news result sets and pages through them in an interactive view
+
+import time
+import logging
+import discord
+import formatter
+import log_util
+from collections import Counter, OrderedDict
+from datetime import datetime, timedelta
+
+
+class NewsCache():
+    """
+    Holds one list of articles per (ticker, start date, end date) window.
+    Entries expire after a time to live and the least recently used entry is
+    evicted once the cache is full, so memory stays bounded.
+    """
+    def __init__(self, max_entries: int = 64, ttl_seconds: int = 900):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (time stored, articles)
+
+    def get(self, key: tuple) -> list | None:
+        """Returns the cached articles for the key or None if missing or expired"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        stored_at, articles = entry
+        if time.monotonic() - stored_at > self.ttl_seconds:
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return articles
+
+    def put(self, key: tuple, articles: list) -> None:
+        """Stores the articles for the key and evicts the oldest entries past the limit"""
+        self._entries[key] = (time.monotonic(), articles)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+def article_source(article: dict) -> str:
+    """Returns the source of an article as shown in the source filter, Discord rejects empty labels"""
+    return (article.get("source") or "Unknown")[:100]
+
+
+class NewsSourceSelect(discord.ui.Select):
+    """Dropdown that filters the paginated news by source"""
+    ALL_SOURCES = "__all__"
+    MAX_SOURCES = 24  # Discord only allows 25 options per select, one is "All sources"
+
+    def __init__(self, source_counts: Counter):
+        options = [discord.SelectOption(label="All sources", value=self.ALL_SOURCES, default=True)]
+
+        # Keep the sources with the most articles when there are too many to list
+        top_sources = [source for source, _ in source_counts.most_common(self.MAX_SOURCES)]
+        options += [discord.SelectOption(label=source, value=source) for source in sorted(top_sources)]
+        if len(source_counts) > self.MAX_SOURCES:
+            placeholder = f"Filter by source (top {self.MAX_SOURCES} of {len(source_counts)})"
+        else:
+            placeholder = "Filter by source"
+        super().__init__(placeholder=placeholder, options=options, row=1)
+
+    async def callback(self, interaction: discord.Interaction) -> None:
+        value = self.values[0]
+        for option in self.options:
+            option.default = option.value == value
+        self.view.set_source(None if value == self.ALL_SOURCES else value)
+        await self.view.refresh(interaction)
+
+
+class NewsDateSelect(discord.ui.Select):
+    """Dropdown that filters the paginated news by how recent the articles are"""
+    WINDOWS = {"1": "Past day", "3": "Past 3 days", "7": "Past week"}
+
+    def __init__(self, max_days: int):
+        options = [
+            discord.SelectOption(label=label, value=days, default=int(days) == max_days)
+            for days, label in self.WINDOWS.items()
+        ]
+        super().__init__(placeholder="Filter by date", options=options, row=2)
+
+    async def callback(self, interaction: discord.Interaction) -> None:
+        value = self.values[0]
+        for option in self.options:
+            option.default = option.value == value
+        self.view.set_days(int(value))
+        await self.view.refresh(interaction)
+
+
+class NewsPaginatorView(discord.ui.View):
+    """
+    Pages through a cached list of news articles with next/previous buttons
+    and source and date filters. Each page embed is only built when it is shown.
+    """
+    def __init__(self, ticker: str, articles: list, end_date: datetime, max_days: int = 7,
+                 page_size: int = 5, timeout: float = 180, on_evict=None):
+        super().__init__(timeout=timeout)
+        self.ticker = ticker
+        self.articles = articles  # Shared with the cache, never modified
+        self.end_date = end_date
+        self.page_size = page_size
+        self.on_evict = on_evict
+        self.message = None  # Set once the response has been sent
+
+        # Filter state
+        self.source = None
+        self.days = max_days
+        self.page = 0
+        self._filtered = None  # Recomputed lazily whenever a filter changes
+
+        self.add_item(NewsSourceSelect(Counter(article_source(article) for article in articles)))
+        self.add_item(NewsDateSelect(max_days))
+        self._update_buttons()
+
+    def filtered_articles(self) -> list:
+        """Returns the articles matching the current source and date filters"""
+        if self._filtered is None:
+            cutoff = (self.end_date - timedelta(days=self.days)).timestamp()
+            self._filtered = [
+                article for article in self.articles
+                if article["datetime"] >= cutoff
+                and (self.source is None or article_source(article) == self.source)
+            ]
+        return self._filtered
+
+    def page_count(self) -> int:
+        return max(1, -(-len(self.filtered_articles()) // self.page_size))
+
+    def set_source(self, source: str | None) -> None:
+        self.source = source
+        self._filtered = None
+        self.page = 0
+
+    def set_days(self, days: int) -> None:
+        self.days = days
+        self._filtered = None
+        self.page = 0
+
+    def build_embed(self) -> discord.Embed:
+        """Builds the embed for the current page only"""
+        articles = self.filtered_articles()
+        if not articles:
+            embed = discord.Embed(
+                title=f"No News for {self.ticker}",
+                description="There are no articles matching the selected filters.",
+                color=discord.Color.red()
+            )
+            formatter.create_embed_footer(embed)
+            return embed
+
+        start = self.page * self.page_size
+        page_articles = articles[start:start + self.page_size]
+        embed = discord.Embed(
+            title=f"Latest news for {self.ticker}",
+            description=f"Page {self.page + 1}/{self.page_count()} of {len(articles)} news articles",
+            color=discord.Color.green()
+        )
+        formatter.embed_news_template(page_articles, embed)
+        return embed
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        # Component interactions bypass the command tree, so start their trace here
+        interaction.extras["trace_id"] = log_util.new_trace_id()
+        return True
+
+    def _update_buttons(self) -> None:
+        self.previous_page.disabled = self.page <= 0
+        self.next_page.disabled = self.page >= self.page_count() - 1
+
+    async def refresh(self, interaction: discord.Interaction) -> None:
+        """Re-renders the current page in place"""
+        self._update_buttons()
+        await interaction.response.edit_message(embed=self.build_embed(), view=self)
+
+    @discord.ui.button(label="Previous", style=discord.ButtonStyle.secondary, row=0)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
+        self.page = max(0, self.page - 1)
+        await self.refresh(interaction)
+
+    @discord.ui.button(label="Next", style=discord.ButtonStyle.secondary, row=0)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
+        self.page = min(self.page_count() - 1, self.page + 1)
+        await self.refresh(interaction)
+
+    async def close(self) -> None:
+        """Disables the controls and releases the view"""
+        self.stop()
+        for item in self.children:
+            item.disabled = True
+        if self.message:
+            try:
+                await self.message.edit(view=self)
+            except discord.HTTPException as e:
+                logging.debug(f"Could not disable news view for {self.ticker}: {e}")
+        if self.on_evict:
+            self.on_evict(self)
+
+    async def on_timeout(self) -> None:
+        await self.close()
+
+
+class NewsViewRegistry():
+    """Keeps track of live news views and closes the oldest once there are too many"""
+    def __init__(self, max_views: int = 50):
+        self.max_views = max_views
+        self._views = OrderedDict()  # id(view) -> view
+
+    def add(self, view: NewsPaginatorView) -> list:
+        """Registers a view and returns the views that were evicted to make room"""
+        self._views[id(view)] = view
+        evicted = []
+        while len(self._views) > self.max_views:
+            _, oldest = self._views.popitem(last=False)
+            evicted.append(oldest)
+        return evicted
+
+    def remove(self, view: NewsPaginatorView) -> None:
+        self._views.pop(id(view), None)
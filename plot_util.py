@@ -1,8 +1,11 @@
-import os
+import io
 import logging
 import datetime
 import pandas as pd
+import matplotlib
+matplotlib.use("Agg")  # Graphs are rendered in worker threads, GUI backends only work on the main thread
 import matplotlib.pyplot as plt
+import matplotlib.dates as mdates
 import numpy as np
 
 class RecommendationTrends() :
@@ -33,10 +36,44 @@ class RecommendationTrends() :
             raise ValueError(f"Invalid date format: {full_date}. Expected format is 'YYYY-MM-DD'.") from e
 
 
-def gen_bar_graph_recommended_trends(ticker : str, rt: RecommendationTrends) -> str: 
+def add_bottom_legend(ax, ncol: int, title: str, handles: list = None, labels: list = None) -> None:
+    """Adds the legend centered below the plot, shared by every graph"""
+    if handles is None:
+        handles, labels = ax.get_legend_handles_labels()
+    ax.legend(
+        handles, 
+        labels,
+        loc="upper center", 
+        bbox_to_anchor=(0.5, -0.15),
+        ncol=ncol, 
+        title=title
+    )
+
+
+def save_figure(file_name: str) -> io.BytesIO:
+    """
+    Saves the current figure as a PNG in memory, closes it and returns the buffer.
+    The buffer's name is set to file_name for use as the attachment file name.
+    Nothing is written to disk, so concurrent renders of the same ticker cannot collide.
+    """
+
+    # Adjust layout to prevent cutting off the bottom
+    plt.tight_layout()
+
+    # Save the figure
+    image = io.BytesIO()
+    plt.savefig(image, format="png")
+    plt.close() # Close the plot to avoid memory issues
+    image.seek(0)
+    image.name = file_name
+
+    return image
+
+
+def gen_bar_graph_recommended_trends(ticker : str, rt: RecommendationTrends) -> io.BytesIO: 
     """
     This function creates a recommendation trends bar graph for the specific ticker 
-    and returns the image path
+    and returns the PNG image in memory
     """
 
     data_rating_set = {
@@ -64,33 +101,15 @@ def gen_bar_graph_recommended_trends(ticker : str, rt: RecommendationTrends) ->
     plt.ylabel("Number of Analyists")
 
     # Add legend at the bottom
-    handles, labels = ax.get_legend_handles_labels()
-    ax.legend(
-        handles, 
-        labels,
-        loc="upper center", 
-        bbox_to_anchor=(0.5, -0.15),
-        ncol=5, 
-        title="Ratings"
-    )
-
-    # Adjust layout to prevent cutting off the bottom
-    plt.tight_layout()
+    add_bottom_legend(ax, ncol=5, title="Ratings")
 
-    # Save the figure
-    graph_dir = "matplotlib_graphs"
-    os.makedirs(graph_dir, exist_ok=True)
-    img_path = os.path.join(os.getcwd(), graph_dir, ticker + "_recommendation_trends_bar.png")
-    plt.savefig(img_path)
-    plt.close() # Close the plot to avoid memory issues
-
-    return img_path
+    return save_figure(ticker + "_recommendation_trends_bar.png")
     
 
-def gen_line_graph_recommended_trends(ticker : str, rt: RecommendationTrends) -> str:
+def gen_line_graph_recommended_trends(ticker : str, rt: RecommendationTrends) -> io.BytesIO:
     """
     This function creates a recommendation trends line graph for the specific ticker 
-    over time and returns the image path. 
+    over time and returns the PNG image in memory. 
 
     Additionally, it will only produce 3 lines in total.
     It will combine strong buy and buy into just one buy category. 
@@ -136,24 +155,105 @@ def gen_line_graph_recommended_trends(ticker : str, rt: RecommendationTrends) ->
             )
            
     # Add legend at the bottom
+    add_bottom_legend(ax, ncol=3, title="Ratings")
+
+    return save_figure(ticker + "_recommendation_trends_line.png")
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling. Returns the indices of at most
+    threshold points that keep the visual shape of the series (peaks and troughs),
+    always including the first and last point.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+
+    # The first and last points are kept, the rest is split into threshold - 2 buckets
+    bucket_size = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+
+        # Average of the next bucket (just the last point for the final bucket)
+        next_end = min(int((i + 2) * bucket_size) + 1, n)
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+
+        # Pick the point forming the largest triangle with the previous pick and the next average
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        indices[i + 1] = a
+
+    return indices
+
+
+def bucket_sum(values: np.ndarray, buckets: int) -> tuple:
+    """Sums values into at most the given number of equal buckets, returns (bucket start indices, sums)"""
+    n = len(values)
+    if buckets >= n:
+        return np.arange(n), np.asarray(values, dtype=np.float64)
+    starts = np.linspace(0, n, buckets, endpoint=False).astype(np.int64)
+    return starts, np.add.reduceat(np.asarray(values, dtype=np.float64), starts)
+
+
+def gen_price_chart(ticker: str, timestamps: list, closes: list, volumes: list = None, range_label: str = "", max_points: int = None) -> io.BytesIO:
+    """
+    This function creates a closing price line graph for the specific ticker with
+    an optional volume overlay and returns the PNG image in memory.
+
+    Long series are downsampled with LTTB to about one point per horizontal pixel
+    (max_points), so the render time does not grow with the requested range.
+    """
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    closes = np.asarray(closes, dtype=np.float64)
+
+    fig, ax = plt.subplots(figsize=(10, 5))
+    if max_points is None:
+        max_points = int(fig.get_figwidth() * fig.dpi)
+
+    # Downsample the price line
+    keep = lttb_indices(timestamps, closes, max_points)
+    dates = timestamps[keep].astype("datetime64[s]")
+    color = "#228B22" if closes[-1] >= closes[0] else "#ff0000"  # Forest Green when up, Red when down
+    ax.plot(dates, closes[keep], color=color, label="Close")
+
+    # Add title and axis labels
+    plt.title(f"{ticker} Price History {range_label}".strip())
+    plt.xlabel("Date")
+    plt.ylabel("Price ($)")
+    locator = mdates.AutoDateLocator()
+    ax.xaxis.set_major_locator(locator)
+    ax.xaxis.set_major_formatter(mdates.ConciseDateFormatter(locator))
+
     handles, labels = ax.get_legend_handles_labels()
-    ax.legend(
-        handles, 
-        labels, 
-        loc="upper center", 
-        bbox_to_anchor=(0.5, -0.15),
-        ncol=3, 
-        title="Ratings"
-    )
+    if volumes is not None:
+        # Sum the volume into the same number of bars as there are price points
+        starts, volume_sums = bucket_sum(volumes, len(keep))
+        volume_dates = timestamps[starts].astype("datetime64[s]")
+        span_days = max(timestamps[-1] - timestamps[0], 1) / 86400
+        volume_ax = ax.twinx()
+        volume_ax.bar(volume_dates, volume_sums, width=span_days / len(starts) * 0.8, color="#FFA500", alpha=0.3, label="Volume")
+        volume_ax.set_ylabel("Volume")
 
-    # Adjust layout to prevent cutting off the bottom
-    plt.tight_layout()
+        # Keep the volume bars in the bottom third, under the price line
+        volume_ax.set_ylim(0, volume_sums.max() * 3 if volume_sums.max() > 0 else 1)
+        ax.set_zorder(volume_ax.get_zorder() + 1)
+        ax.patch.set_visible(False)
 
-    # Save the figure
-    graph_dir = "matplotlib_graphs"
-    os.makedirs(graph_dir, exist_ok=True)
-    img_path = os.path.join(os.getcwd(), graph_dir, ticker + "_recommendation_trends_line.png")
-    plt.savefig(img_path)
-    plt.close() # Close the plot to avoid memory issues
+        volume_handles, volume_labels = volume_ax.get_legend_handles_labels()
+        handles += volume_handles
+        labels += volume_labels
+
+    # Add legend at the bottom
+    add_bottom_legend(ax, ncol=2, title=None, handles=handles, labels=labels)
 
-    return img_path
+    return save_figure(ticker + "_price_chart.png")
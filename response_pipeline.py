@@ -0,0 +1,103 @@
+# This file provides a common way for cogs to answer slow interactions progressively
+
+import time
+import asyncio
+import logging
+import discord
+
+# pyplot keeps global state (the current figure), so only one figure is rendered at a time.
+# plot_util pins the non-GUI Agg backend, which is what makes rendering off the main thread safe.
+RENDER_LOCK = asyncio.Lock()
+
+
+async def reply(interaction: discord.Interaction, content: str) -> None:
+    """Sends a short text reply whether or not the interaction has already been deferred"""
+    if interaction.response.is_done():
+        await interaction.edit_original_response(content=content)
+    else:
+        await interaction.response.send_message(content)
+
+
+class ProgressiveResponse():
+    """
+    Defers an interaction immediately so Discord's 3 second window never expires,
+    then fills in the response as each stage finishes. Blocking work (upstream
+    calls, pandas, matplotlib) runs in a worker thread and every stage is timed.
+
+    Usage:
+        async with ProgressiveResponse(interaction, "get-quote-rating") as response:
+            data = await response.run("fetch", client.recommendation_trends, ticker)
+            await response.send(content="Partial result")
+            image = await response.render("bar chart", plot_util.gen_bar_graph_recommended_trends, ticker, rt)
+            await response.send(files=[discord.File(image, filename=image.name)])
+    """
+    def __init__(self, interaction: discord.Interaction, name: str):
+        self.interaction = interaction
+        self.name = name
+        self.timings = []  # (stage, seconds)
+        self.message = None  # The original response once something has been sent
+        self._started = time.perf_counter()
+
+    async def __aenter__(self):
+        await self.defer()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.log_timings()
+        return False
+
+    async def defer(self) -> None:
+        """Acknowledges the interaction so we have 15 minutes to respond"""
+        if not self.interaction.response.is_done():
+            start = time.perf_counter()
+            await self.interaction.response.defer(thinking=True)
+            self.timings.append(("defer", time.perf_counter() - start))
+
+    async def run(self, stage: str, func, *args, **kwargs):
+        """Runs a blocking function in a worker thread and records how long it took"""
+        start = time.perf_counter()
+        try:
+            return await asyncio.to_thread(func, *args, **kwargs)
+        finally:
+            self.timings.append((stage, time.perf_counter() - start))
+
+    async def run_async(self, stage: str, awaitable):
+        """Awaits a coroutine and records how long it took"""
+        start = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            self.timings.append((stage, time.perf_counter() - start))
+
+    async def render(self, stage: str, func, *args, **kwargs):
+        """Runs a matplotlib render in a worker thread, one render at a time"""
+        async with RENDER_LOCK:
+            return await self.run(stage, func, *args, **kwargs)
+
+    async def send(self, content: str = None, embed: discord.Embed = None, embeds: list = None,
+                   files: list = None, view: discord.ui.View = None) -> discord.InteractionMessage:
+        """
+        Replaces the 'thinking' placeholder on the first call and edits the same message after that.
+        Only the given parts are changed, so later stages can add charts under an earlier partial result.
+        """
+        kwargs = {}
+        if content is not None:
+            kwargs["content"] = content
+        if embed is not None:
+            kwargs["embed"] = embed
+        if embeds is not None:
+            kwargs["embeds"] = embeds
+        if files is not None:
+            kwargs["attachments"] = files
+        if view is not None:
+            kwargs["view"] = view
+
+        start = time.perf_counter()
+        self.message = await self.interaction.edit_original_response(**kwargs)
+        self.timings.append(("send", time.perf_counter() - start))
+        return self.message
+
+    def log_timings(self) -> None:
+        total = time.perf_counter() - self._started
+        stages = ", ".join(f"{stage}={seconds * 1000:.0f}ms" for stage, seconds in self.timings)
+        logging.info(f"{self.name} finished in {total * 1000:.0f}ms ({stages})")